@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.api.schemas import AnonymizeRequest, AnonymizeResponse
+from fastapi import APIRouter, HTTPException, Depends, Query
+from botocore.exceptions import ClientError
+from typing import List, Optional
+from app.api.schemas import AnonymizeRequest, AnonymizeResponse, DetectionsResponse
 from app.services.job_processor import JobProcessor
+from app.utils.detection_utils import DetectionUtils
 import structlog
 
 router = APIRouter()
@@ -14,9 +17,45 @@ async def anonymize_image(request: AnonymizeRequest):
             bucket=request.bucket,
             key=request.s3_key,
             overwrite=request.overwrite,
-            output_prefix=request.output_prefix
+            output_prefix=request.output_prefix,
+            tiling=request.tiling.model_dump(exclude_none=True) if request.tiling else None
         )
         return result
+    except ValueError as e:
+        logger.error("job_rejected", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("job_failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/detections", response_model=DetectionsResponse)
+async def get_detections(
+    bucket: str,
+    s3_key: str,
+    label: Optional[List[str]] = Query(None),
+    min_score: float = 0.0
+):
+    try:
+        processor = JobProcessor()
+        detections = processor.fetch_detections(
+            bucket=bucket,
+            detections_key=s3_key,
+            labels=label,
+            min_score=min_score
+        )
+        return {
+            "detections_s3_key": s3_key,
+            "model_version": str(detections["model_version"]),
+            "count": len(detections["labels"]),
+            "detections": DetectionUtils.to_records(detections)
+        }
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            raise HTTPException(status_code=404, detail=f"Detections not found: {s3_key}")
+        logger.error("detections_fetch_failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("detections_fetch_failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
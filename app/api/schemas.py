@@ -1,5 +1,13 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class TilingOptions(BaseModel):
+    # Smallest face to detect; plates always use MIN_PLATE_PX.
+    # 12px is MTCNN's P-Net cell; smaller faces would need upscaling
+    min_object_px: Optional[int] = Field(None, ge=12)
+    max_object_px: Optional[int] = Field(None, ge=12)
+    tile_size: Optional[int] = Field(None, ge=256)
+    overlap: Optional[int] = Field(None, ge=0)
 
 class AnonymizeRequest(BaseModel):
     s3_key: str
@@ -7,9 +15,24 @@ class AnonymizeRequest(BaseModel):
     overwrite: bool = False
     output_prefix: str = "processed/"
     confidence_threshold: float = 0.5
+    tiling: Optional[TilingOptions] = None
 
 class AnonymizeResponse(BaseModel):
     job_id: str
     status: str
     processed_s3_key: str
     objects_detected: int
+    detections_s3_key: str
+    summary: Dict[str, int]
+    model_version: str
+
+class Detection(BaseModel):
+    label: str
+    box: List[float]
+    score: float
+
+class DetectionsResponse(BaseModel):
+    detections_s3_key: str
+    model_version: str
+    count: int
+    detections: List[Detection]
@@ -11,6 +11,19 @@ class Settings(BaseSettings):
     # Model Config
     MODEL_CONFIDENCE_THRESHOLD: float = 0.5
     USE_GPU: bool = False
+    MODEL_VERSION: str = "mtcnn-2.5.3+haar-plate"
+    
+    # Detection & Tiling
+    MIN_FACE_PX: int = 20
+    MIN_PLATE_PX: int = 30
+    DETECTOR_MAX_SCALED_PX: int = 1200
+    TILING_MAX_OBJECT_PX: int = 200
+    MAX_TILES_PER_IMAGE: int = 1024
+    
+    # Windowed Processing (large TIFF/BigTIFF inputs)
+    MEMORY_BUDGET_MB: int = 1024
+    WINDOW_OVERLAP_PX: int = 256
+    SCRATCH_DIR: Optional[str] = None
     
     class Config:
         case_sensitive = True
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import List
+from typing import List, Tuple
 import structlog
 import cv2
 import os
@@ -35,9 +35,10 @@ class InferenceEngine:
             
         self.models_loaded = True
 
-    def detect_faces(self, image: np.array) -> List[List[int]]:
+    def detect_faces(self, image: np.array, min_face_size: int = 20) -> List[Tuple[List[int], float]]:
         """
-        Returns list of [x, y, w, h] for detected faces.
+        Returns list of ([x, y, w, h], probability) for detected faces.
+        min_face_size: smallest face in native pixels; sets MTCNN's pyramid start scale.
         """
         if image is None:
             return []
@@ -46,34 +47,38 @@ class InferenceEngine:
         img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
         try:
-            boxes, _ = self.mtcnn.detect(img_rgb)
+            # MTCNN reads min_face_size at detect time; the engine is a process-wide singleton
+            self.mtcnn.min_face_size = min_face_size
+            boxes, probs = self.mtcnn.detect(img_rgb)
         except Exception as e:
             logger.error("mtcnn_error", error=str(e))
             return []
             
         result = []
         if boxes is not None:
-            for box in boxes:
+            for box, prob in zip(boxes, probs):
                 x1, y1, x2, y2 = box
                 w = x2 - x1
                 h = y2 - y1
-                result.append([int(x1), int(y1), int(w), int(h)])
+                result.append(([int(x1), int(y1), int(w), int(h)], float(prob)))
                 
         return result
 
-    def detect_plates(self, image: np.array) -> List[List[int]]:
+    def detect_plates(self, image: np.array, min_size: int = 30) -> List[Tuple[List[int], float]]:
         """
-        Returns list of [x, y, w, h] for detected license plates.
+        Returns list of ([x, y, w, h], score) for detected license plates.
+        min_size: smallest plate side in native pixels.
+        The Haar cascade has no calibrated confidence, so every plate scores 1.0.
         """
         if self.plate_cascade is None:
             return []
             
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        plates = self.plate_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        plates = self.plate_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size))
         
         # plates is already a list of [x, y, w, h] or empty tuple
         if len(plates) == 0:
             return []
             
         # Convert numpy array to list
-        return [list(p) for p in plates]
+        return [([int(v) for v in p], 1.0) for p in plates]
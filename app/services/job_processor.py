@@ -1,51 +1,97 @@
 import cv2
 import numpy as np
+import os
+import tempfile
 import uuid
 import structlog
+import tifffile
+from app.core.config import settings
 from app.services.s3_handler import S3Handler
 from app.models.inference_engine import InferenceEngine
 from app.services.privacy_blurrer import PrivacyBlurrer
+from app.utils.detection_utils import DetectionUtils, SIDECAR_SUFFIX
 from app.utils.image_utils import ImageUtils
 
 logger = structlog.get_logger()
 
+# Rough number of window-sized buffers alive at once during windowed processing
+# (window copy, colour-converted copy for detection, blurred copy).
+WINDOW_MEMORY_FACTOR = 4
+OUTPUT_TILE_SIZE = 512
+
+# GeoTIFF tags copied to the output so orthomosaics stay georeferenced:
+# ModelPixelScale, ModelTiepoint, ModelTransformation, GeoKeyDirectory,
+# GeoDoubleParams, GeoAsciiParams, GDAL_METADATA, GDAL_NODATA.
+GEOTIFF_TAGS = (33550, 33922, 34264, 34735, 34736, 34737, 42112, 42113)
+
 class JobProcessor:
     def __init__(self):
         self.s3_handler = S3Handler()
         self.inference_engine = InferenceEngine()
         self.blurrer = PrivacyBlurrer()
 
-    def process_image_data(self, image: np.array) -> tuple[np.array, list]:
-        h, w, _ = image.shape
-        logger.info("image_decoded", width=w, height=h)
-        
-        all_detections = [] # List of (box, label)
+    @staticmethod
+    def plan_tiling(h: int, w: int, tiling: dict = None) -> dict:
+        """
+        Builds the tiling plan for an image from the configured detector limits.
+        tiling: optional per-request overrides (min_object_px, max_object_px, tile_size, overlap).
+        """
+        options = {
+            "min_object_px": settings.MIN_FACE_PX,
+            "max_object_px": settings.TILING_MAX_OBJECT_PX,
+            "max_scaled_px": settings.DETECTOR_MAX_SCALED_PX,
+            "max_tiles": settings.MAX_TILES_PER_IMAGE
+        }
+        options.update(tiling or {})
+        plan = ImageUtils.plan_tiling(h, w, **options)
+        logger.info("tiling_plan", width=w, height=h, **plan)
+        return plan
+
+    def detect_objects(self, image: np.array, tiling: dict = None) -> list:
+        """
+        Runs face and plate detection on a BGR image.
+        Returns a list of ([x, y, w, h], label, score) in image coordinates.
+        """
+        h, w = image.shape[:2]
+        all_detections = [] # List of (box, label, score)
+
+        # A requested minimum object size drives MTCNN (and the tiling plan); plates keep MIN_PLATE_PX
+        min_face_px = (tiling or {}).get("min_object_px") or settings.MIN_FACE_PX
+        min_plate_px = settings.MIN_PLATE_PX
         
         # 3. Tiling & Inference
-        if w > 2000 or h > 2000:
-            logger.info("using_tiling_strategy")
-            tiles = ImageUtils.slice_image(image)
+        plan = self.plan_tiling(h, w, tiling)
+        if plan["tiled"]:
+            tiles = ImageUtils.slice_image_grid(image, plan)
             for tile, x_off, y_off in tiles:
                 # Detect faces
-                face_boxes = self.inference_engine.detect_faces(tile)
-                for b in face_boxes:
+                face_boxes = self.inference_engine.detect_faces(tile, min_face_px)
+                for b, score in face_boxes:
                     # Adjust coordinates
                     global_box = [b[0] + x_off, b[1] + y_off, b[2], b[3]]
-                    all_detections.append((global_box, 'face'))
+                    all_detections.append((global_box, 'face', score))
                     
                 # Detect plates
-                plate_boxes = self.inference_engine.detect_plates(tile)
-                for b in plate_boxes:
+                plate_boxes = self.inference_engine.detect_plates(tile, min_plate_px)
+                for b, score in plate_boxes:
                     global_box = [b[0] + x_off, b[1] + y_off, b[2], b[3]]
-                    all_detections.append((global_box, 'plate'))
+                    all_detections.append((global_box, 'plate', score))
         else:
-            face_boxes = self.inference_engine.detect_faces(image)
-            for b in face_boxes:
-                all_detections.append((b, 'face'))
+            face_boxes = self.inference_engine.detect_faces(image, min_face_px)
+            for b, score in face_boxes:
+                all_detections.append((b, 'face', score))
                 
-            plate_boxes = self.inference_engine.detect_plates(image)
-            for b in plate_boxes:
-                all_detections.append((b, 'plate'))
+            plate_boxes = self.inference_engine.detect_plates(image, min_plate_px)
+            for b, score in plate_boxes:
+                all_detections.append((b, 'plate', score))
+
+        return all_detections
+
+    def process_image_data(self, image: np.array, tiling: dict = None) -> tuple[np.array, dict]:
+        h, w, _ = image.shape
+        logger.info("image_decoded", width=w, height=h)
+        
+        all_detections = self.detect_objects(image, tiling)
             
         # 4. Merge Boxes (NMS) - simplified for now, just merging boxes regardless of label
         # Ideally we should NMS per class or keep labels. 
@@ -59,28 +105,138 @@ class JobProcessor:
         # Let's skip merge_boxes for metadata output to preserve individual detections, 
         # BUT use merged boxes for blurring to avoid double blurring.
         
-        metadata = []
-        for box, label in all_detections:
-            # Normalize coordinates
-            nx = box[0] / w
-            ny = box[1] / h
-            nw = box[2] / w
-            nh = box[3] / h
-            metadata.append({
-                "label": label,
-                "box": [nx, ny, nw, nh],
-                "score": 1.0 # Placeholder
-            })
+        detections = DetectionUtils.to_arrays(all_detections, w, h, settings.MODEL_VERSION)
 
         logger.info("objects_detected", count=len(final_boxes))
         
         # 5. Blur
         processed_image = self.blurrer.apply_blur(image, final_boxes)
-        return processed_image, metadata
+        return processed_image, detections
+
+    def process_tiff_file(self, input_path: str, output_path: str, tiling: dict = None) -> dict:
+        """
+        Windowed processing for (Big)TIFF inputs such as stitched orthomosaics.
+        The first page is decoded segment by segment into a memory-mapped scratch
+        file, then detected, blurred and written back window by window so peak
+        memory is bounded by MEMORY_BUDGET_MB rather than by the image size.
+        """
+        with tempfile.TemporaryDirectory(dir=settings.SCRATCH_DIR) as scratch_dir:
+            with tifffile.TiffFile(input_path) as tif:
+                page = tif.pages[0]
+                if len(page.shape) != 3 or page.shape[2] not in (3, 4) or page.dtype != np.uint8:
+                    raise ValueError(f"Unsupported TIFF layout for windowed processing: shape={page.shape}, dtype={page.dtype}")
+                # tifffile decodes YCbCr/JPEG pages to RGB(A), so the output is always written as RGB
+                extrasamples = (page.extrasamples or ('unassalpha',)) if page.shape[2] == 4 else None
+                extratags = [(tag.code, tag.dtype, tag.count, tag.value, True)
+                             for tag in page.tags.values() if tag.code in GEOTIFF_TAGS]
+                source = page.asarray(out=os.path.join(scratch_dir, 'source.raw'))
+
+            h, w, c = source.shape
+            max_pixels = settings.MEMORY_BUDGET_MB * 1024 * 1024 // (c * WINDOW_MEMORY_FACTOR)
+            # Padding must cover the largest expected object, otherwise an object crossing
+            # a window edge fits in no padded window and is never detected
+            overlap = max(settings.WINDOW_OVERLAP_PX, (tiling or {}).get("max_object_px", settings.TILING_MAX_OBJECT_PX))
+            windows = ImageUtils.plan_windows(h, w, max_pixels, overlap)
+            logger.info("using_windowed_strategy", width=w, height=h, windows=len(windows), overlap=overlap)
+
+            # Pass 1: detect on each window padded by the overlap, keeping only
+            # detections centred in the window core so neighbours don't duplicate them.
+            all_detections = []
+            for x, y, ww, wh in windows:
+                x0, y0 = max(0, x - overlap), max(0, y - overlap)
+                x1, y1 = min(w, x + ww + overlap), min(h, y + wh + overlap)
+                region = np.ascontiguousarray(source[y0:y1, x0:x1])
+                code = cv2.COLOR_RGB2BGR if c == 3 else cv2.COLOR_RGBA2BGR
+                for b, label, score in self.detect_objects(cv2.cvtColor(region, code), tiling):
+                    global_box = [b[0] + x0, b[1] + y0, b[2], b[3]]
+                    cx = global_box[0] + global_box[2] / 2
+                    cy = global_box[1] + global_box[3] / 2
+                    if x <= cx < x + ww and y <= cy < y + wh:
+                        all_detections.append((global_box, label, score))
+
+            final_boxes = ImageUtils.merge_boxes([d[0] for d in all_detections])
+            logger.info("objects_detected", count=len(final_boxes))
+
+            # Pass 2: blur each window core. The read region is grown to cover every
+            # box touching the core so boxes spanning windows blur without seams.
+            result = np.memmap(os.path.join(scratch_dir, 'result.raw'), dtype=source.dtype, mode='w+', shape=source.shape)
+            for x, y, ww, wh in windows:
+                boxes = [b for b in final_boxes
+                         if b[0] < x + ww and b[0] + b[2] > x and b[1] < y + wh and b[1] + b[3] > y]
+                x0 = max(0, min([x] + [b[0] for b in boxes]))
+                y0 = max(0, min([y] + [b[1] for b in boxes]))
+                x1 = min(w, max([x + ww] + [b[0] + b[2] for b in boxes]))
+                y1 = min(h, max([y + wh] + [b[1] + b[3] for b in boxes]))
+                region = np.ascontiguousarray(source[y0:y1, x0:x1])
+                local_boxes = [[b[0] - x0, b[1] - y0, b[2], b[3]] for b in boxes]
+                blurred = self.blurrer.apply_blur(region, local_boxes) if local_boxes else region
+                result[y:y + wh, x:x + ww] = blurred[y - y0:y - y0 + wh, x - x0:x - x0 + ww]
+            result.flush()
+
+            def tiles():
+                for ty in range(0, h, OUTPUT_TILE_SIZE):
+                    for tx in range(0, w, OUTPUT_TILE_SIZE):
+                        yield np.ascontiguousarray(result[ty:ty + OUTPUT_TILE_SIZE, tx:tx + OUTPUT_TILE_SIZE])
+
+            tifffile.imwrite(
+                output_path,
+                tiles(),
+                shape=source.shape,
+                dtype=source.dtype,
+                tile=(OUTPUT_TILE_SIZE, OUTPUT_TILE_SIZE),
+                photometric='rgb',
+                extrasamples=extrasamples,
+                extratags=extratags,
+                compression='zlib',
+                bigtiff=source.nbytes > 2**32 - 2**25
+            )
 
-    def process_job(self, bucket: str, key: str, overwrite: bool = False, output_prefix: str = "processed/") -> dict:
+            detections = DetectionUtils.to_arrays(all_detections, w, h, settings.MODEL_VERSION)
+            # Release the memory maps before the scratch directory is removed
+            del source, result
+
+        return detections
+
+    def upload_detections(self, detections: dict, bucket: str, output_key: str) -> str:
+        detections_key = f"{output_key}{SIDECAR_SUFFIX}"
+        self.s3_handler.upload_image(DetectionUtils.to_bytes(detections), bucket, detections_key, content_type='application/octet-stream')
+        return detections_key
+
+    def fetch_detections(self, bucket: str, detections_key: str, labels: list = None, min_score: float = 0.0) -> dict:
+        """Loads a detection sidecar from S3 and applies label/score filters."""
+        detections = DetectionUtils.from_bytes(self.s3_handler.download_image(bucket, detections_key))
+        return DetectionUtils.filter(detections, labels=labels, min_score=min_score)
+
+    def process_tiff_job(self, job_id: str, bucket: str, key: str, output_key: str, tiling: dict = None) -> dict:
+        with tempfile.TemporaryDirectory(dir=settings.SCRATCH_DIR) as scratch_dir:
+            input_path = os.path.join(scratch_dir, 'input.tif')
+            output_path = os.path.join(scratch_dir, 'output.tif')
+            self.s3_handler.download_file(bucket, key, input_path)
+            detections = self.process_tiff_file(input_path, output_path, tiling)
+            self.s3_handler.upload_file(output_path, bucket, output_key, content_type='image/tiff')
+        detections_key = self.upload_detections(detections, bucket, output_key)
+
+        return {
+            "job_id": job_id,
+            "status": "success",
+            "processed_s3_key": output_key,
+            "objects_detected": len(detections["labels"]),
+            "detections_s3_key": detections_key,
+            "summary": DetectionUtils.summarize(detections),
+            "model_version": str(detections["model_version"])
+        }
+
+    def process_job(self, bucket: str, key: str, overwrite: bool = False, output_prefix: str = "processed/", tiling: dict = None) -> dict:
         job_id = str(uuid.uuid4())
         logger.info("starting_job", job_id=job_id, bucket=bucket, key=key)
+
+        if ImageUtils.is_tiff(key):
+            if overwrite:
+                output_key = key
+            else:
+                root, ext = os.path.splitext(key.split('/')[-1])
+                output_key = f"{output_prefix}{root}_anonymized{ext}"
+            return self.process_tiff_job(job_id, bucket, key, output_key, tiling)
         
         # 1. Download
         image_bytes = self.s3_handler.download_image(bucket, key)
@@ -92,7 +248,7 @@ class JobProcessor:
             raise ValueError("Failed to decode image")
             
         # 3-5. Process
-        processed_image, metadata = self.process_image_data(image)
+        processed_image, detections = self.process_image_data(image, tiling)
         
         # 6. Encode & Upload
         _, encoded_img = cv2.imencode('.jpg', processed_image)
@@ -105,36 +261,49 @@ class JobProcessor:
             output_key = f"{output_prefix}{filename.replace('.jpg', '_anonymized.jpg')}"
             
         self.s3_handler.upload_image(processed_bytes, bucket, output_key)
+        detections_key = self.upload_detections(detections, bucket, output_key)
         
         return {
             "job_id": job_id,
             "status": "success",
             "processed_s3_key": output_key,
-            "objects_detected": len(metadata),
-            "metadata": metadata
+            "objects_detected": len(detections["labels"]),
+            "detections_s3_key": detections_key,
+            "summary": DetectionUtils.summarize(detections),
+            "model_version": str(detections["model_version"])
         }
 
-    def process_local_job(self, input_path: str, output_path: str) -> dict:
+    def process_local_job(self, input_path: str, output_path: str, tiling: dict = None) -> dict:
         job_id = str(uuid.uuid4())
         logger.info("starting_local_job", job_id=job_id, input_path=input_path)
-        
-        # 1. Read
-        image = cv2.imread(input_path)
-        if image is None:
-            raise ValueError(f"Failed to read image from {input_path}")
+
+        if ImageUtils.is_tiff(input_path):
+            detections = self.process_tiff_file(input_path, output_path, tiling)
+        else:
+            # 1. Read
+            image = cv2.imread(input_path)
+            if image is None:
+                raise ValueError(f"Failed to read image from {input_path}")
+                
+            # 2. Process
+            processed_image, detections = self.process_image_data(image, tiling)
             
-        # 2. Process
-        processed_image, metadata = self.process_image_data(image)
-        
-        # 3. Write Image
-        success = cv2.imwrite(output_path, processed_image)
-        if not success:
-            raise IOError(f"Failed to write image to {output_path}")
+            # 3. Write Image
+            success = cv2.imwrite(output_path, processed_image)
+            if not success:
+                raise IOError(f"Failed to write image to {output_path}")
+
+        # 4. Write Detections Sidecar
+        detections_path = f"{output_path}{SIDECAR_SUFFIX}"
+        with open(detections_path, 'wb') as f:
+            f.write(DetectionUtils.to_bytes(detections))
             
         return {
             "job_id": job_id,
             "status": "success",
             "output_path": output_path,
-            "objects_detected": len(metadata),
-            "metadata": metadata
+            "objects_detected": len(detections["labels"]),
+            "detections_path": detections_path,
+            "summary": DetectionUtils.summarize(detections),
+            "model_version": str(detections["model_version"])
         }
@@ -20,7 +20,7 @@ class S3Handler:
             logger.error("s3_download_failed", error=str(e), bucket=bucket, key=key)
             raise e
 
-    def upload_image(self, image_bytes: bytes, bucket: str, key: str):
+    def upload_image(self, image_bytes: bytes, bucket: str, key: str, content_type: str = 'image/jpeg'):
         """Uploads an image (bytes) to S3."""
         try:
             logger.info("uploading_image", bucket=bucket, key=key)
@@ -28,7 +28,30 @@ class S3Handler:
                 Bucket=bucket,
                 Key=key,
                 Body=image_bytes,
-                ContentType='image/jpeg'
+                ContentType=content_type
+            )
+        except ClientError as e:
+            logger.error("s3_upload_failed", error=str(e), bucket=bucket, key=key)
+            raise e
+
+    def download_file(self, bucket: str, key: str, path: str):
+        """Streams an object from S3 to a local file without buffering it in memory."""
+        try:
+            logger.info("downloading_file", bucket=bucket, key=key, path=path)
+            self.s3_client.download_file(bucket, key, path)
+        except ClientError as e:
+            logger.error("s3_download_failed", error=str(e), bucket=bucket, key=key)
+            raise e
+
+    def upload_file(self, path: str, bucket: str, key: str, content_type: str = 'image/tiff'):
+        """Uploads a local file to S3 (multipart for large files)."""
+        try:
+            logger.info("uploading_file", bucket=bucket, key=key, path=path)
+            self.s3_client.upload_file(
+                path,
+                bucket,
+                key,
+                ExtraArgs={'ContentType': content_type}
             )
         except ClientError as e:
             logger.error("s3_upload_failed", error=str(e), bucket=bucket, key=key)
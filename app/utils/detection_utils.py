@@ -0,0 +1,78 @@
+import io
+import zipfile
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LABELS = ('face', 'plate')
+SIDECAR_SUFFIX = '.detections.npz'
+SIDECAR_FIELDS = ('boxes', 'labels', 'scores', 'label_names', 'model_version')
+
+class DetectionUtils:
+    @staticmethod
+    def to_arrays(detections: List[Tuple[List[int], str, float]], w: int, h: int, model_version: str) -> Dict[str, np.ndarray]:
+        """
+        Packs ([x, y, w, h], label, score) detections into columnar arrays.
+        boxes: float32 (N, 4) normalized [x, y, w, h]
+        labels: uint8 (N,) indices into label_names
+        scores: float32 (N,) face probability from MTCNN, 1.0 for cascade plates
+        """
+        boxes = np.array([d[0] for d in detections], dtype=np.float32).reshape(-1, 4)
+        boxes /= np.array([w, h, w, h], dtype=np.float32)
+        labels = np.array([LABELS.index(d[1]) for d in detections], dtype=np.uint8)
+        scores = np.array([d[2] for d in detections], dtype=np.float32)
+
+        return {
+            "boxes": boxes,
+            "labels": labels,
+            "scores": scores,
+            "label_names": np.array(LABELS),
+            "model_version": np.array(model_version)
+        }
+
+    @staticmethod
+    def to_bytes(arrays: Dict[str, np.ndarray]) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Dict[str, np.ndarray]:
+        """Raises ValueError if data is not a detection sidecar."""
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (ValueError, OSError, EOFError, zipfile.BadZipFile, AttributeError) as e:
+            raise ValueError(f"Not a detection sidecar: {e}")
+
+        missing = [name for name in SIDECAR_FIELDS if name not in arrays]
+        if missing:
+            raise ValueError(f"Not a detection sidecar, missing {missing}")
+        return arrays
+
+    @staticmethod
+    def summarize(arrays: Dict[str, np.ndarray]) -> Dict[str, int]:
+        """Returns the number of detections per label."""
+        counts = np.bincount(arrays["labels"], minlength=len(arrays["label_names"]))
+        return {str(name): int(count) for name, count in zip(arrays["label_names"], counts)}
+
+    @staticmethod
+    def filter(arrays: Dict[str, np.ndarray], labels: Optional[Sequence[str]] = None, min_score: float = 0.0) -> Dict[str, np.ndarray]:
+        """Selects detections by label name and minimum score."""
+        mask = arrays["scores"] >= min_score
+        if labels:
+            wanted = [i for i, name in enumerate(arrays["label_names"]) if name in labels]
+            mask &= np.isin(arrays["labels"], wanted)
+
+        filtered = dict(arrays)
+        for name in ("boxes", "labels", "scores"):
+            filtered[name] = arrays[name][mask]
+        return filtered
+
+    @staticmethod
+    def to_records(arrays: Dict[str, np.ndarray]) -> List[dict]:
+        """Expands the arrays into a list of {"label", "box", "score"} dicts."""
+        names = arrays["label_names"].tolist()
+        return [
+            {"label": names[label], "box": box, "score": score}
+            for box, label, score in zip(arrays["boxes"].tolist(), arrays["labels"].tolist(), arrays["scores"].tolist())
+        ]
@@ -1,29 +1,122 @@
+import math
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+# Smallest face MTCNN's P-Net sees at native resolution (its 12x12 input cell)
+PNET_CELL_PX = 12
 
 class ImageUtils:
     @staticmethod
-    def slice_image(image: np.array, tile_size: int = 1024, overlap: float = 0.2) -> List[Tuple[np.array, int, int]]:
+    def is_tiff(path: str) -> bool:
+        return path.lower().endswith(TIFF_EXTENSIONS)
+
+    @staticmethod
+    def plan_windows(height: int, width: int, max_pixels: int, overlap: int = 0) -> List[Tuple[int, int, int, int]]:
+        """
+        Splits an image into non-overlapping core windows such that each window,
+        padded by `overlap` on every side, holds at most `max_pixels` pixels.
+        Prefers full-width strips and falls back to square windows for very wide images.
+        Returns a list of (x, y, w, h).
+        """
+        if height * width <= max_pixels:
+            return [(0, 0, width, height)]
+
+        win_w = width
+        win_h = max_pixels // width - 2 * overlap
+        if win_h < max(1, overlap):
+            side = math.isqrt(max_pixels) - 2 * overlap
+            if side <= 0:
+                raise ValueError("Memory budget too small for the configured window overlap")
+            win_w = min(side, width)
+            win_h = side
+
+        windows = []
+        for y in range(0, height, win_h):
+            for x in range(0, width, win_w):
+                windows.append((x, y, min(win_w, width - x), min(win_h, height - y)))
+
+        return windows
+
+    @staticmethod
+    def plan_tiling(
+        height: int,
+        width: int,
+        min_object_px: int,
+        max_object_px: int,
+        max_scaled_px: int = 1200,
+        max_tiles: int = 1024,
+        tile_size: Optional[int] = None,
+        overlap: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Chooses whether and how to tile an image for detection.
+        MTCNN's first pyramid level rescales its input by PNET_CELL_PX / min_object_px,
+        so a tile of side T costs a detector pass over T * PNET_CELL_PX / min_object_px
+        pixels per side. Tiles are sized so that stays within max_scaled_px, bounding
+        per-call memory and latency. Tiling itself does not change recall; the minimum
+        object size is applied by the detectors.
+        Overlap defaults to max_object_px so every object lies wholly inside a tile,
+        capped just below half the tile size.
+        The smallest grid within these limits is picked, which minimizes the total
+        number of pixels processed. tile_size/overlap override the derived values.
+        Raises ValueError for invalid parameters or plans of more than max_tiles tiles.
+        """
+        if min_object_px <= 0 or max_object_px <= 0:
+            raise ValueError("Object sizes must be positive")
+        if tile_size is None:
+            tile_size = max_scaled_px * min_object_px // PNET_CELL_PX
+        if tile_size <= 0:
+            raise ValueError("Tile size must be positive")
+
+        if height <= tile_size and width <= tile_size:
+            return {
+                "tiled": False, "tile_width": width, "tile_height": height, "overlap": 0,
+                "cols": 1, "rows": 1, "tiles": 1, "pixels": width * height
+            }
+
+        if overlap is None:
+            overlap = max(0, min(max_object_px, (tile_size - 1) // 2))
+        if overlap < 0:
+            raise ValueError("Overlap must be non-negative")
+        if 2 * overlap >= tile_size:
+            raise ValueError(f"Overlap {overlap}px must be less than half the tile size {tile_size}px")
+
+        def grid(length: int) -> Tuple[int, int]:
+            # Fewest tiles of at most tile_size covering length with the given overlap
+            count = max(1, math.ceil((length - overlap) / (tile_size - overlap)))
+            extent = math.ceil((length + (count - 1) * overlap) / count)
+            return count, extent
+
+        cols, tile_width = grid(width)
+        rows, tile_height = grid(height)
+        if cols * rows > max_tiles:
+            raise ValueError(f"Tiling plan needs {cols * rows} tiles, more than the limit of {max_tiles}")
+
+        return {
+            "tiled": True, "tile_width": tile_width, "tile_height": tile_height, "overlap": overlap,
+            "cols": cols, "rows": rows, "tiles": cols * rows,
+            "pixels": cols * tile_width * rows * tile_height
+        }
+
+    @staticmethod
+    def slice_image_grid(image: np.array, plan: Dict[str, int]) -> List[Tuple[np.array, int, int]]:
         """
-        Slices an image into overlapping tiles.
+        Slices an image according to a plan from plan_tiling.
         Returns a list of (tile_image, x_offset, y_offset).
         """
-        h, w, _ = image.shape
-        step = int(tile_size * (1 - overlap))
-        
+        h, w = image.shape[:2]
+
+        def starts(length: int, count: int, extent: int) -> List[int]:
+            step = extent - plan["overlap"]
+            return [min(i * step, max(0, length - extent)) for i in range(count)]
+
         tiles = []
-        for y in range(0, h, step):
-            for x in range(0, w, step):
-                # Calculate tile boundaries
-                y_end = min(y + tile_size, h)
-                x_end = min(x + tile_size, w)
-                
-                # Adjust start if we're at the edge to ensure full tile size if possible
-                # (Optional optimization, for now simple slicing is fine)
-                
-                tile = image[y:y_end, x:x_end]
-                tiles.append((tile, x, y))
-                
+        for y in starts(h, plan["rows"], plan["tile_height"]):
+            for x in starts(w, plan["cols"], plan["tile_width"]):
+                tiles.append((image[y:y + plan["tile_height"], x:x + plan["tile_width"]], x, y))
+
         return tiles
 
     @staticmethod
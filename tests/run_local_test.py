@@ -12,6 +12,7 @@ import shutil
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.services.job_processor import JobProcessor
+from app.utils.detection_utils import DetectionUtils, SIDECAR_SUFFIX
 
 logger = structlog.get_logger()
 
@@ -119,12 +120,12 @@ def generate_viewer(output_dir, image_files):
     for img_file in image_files:
         filename = os.path.basename(img_file)
         original_filename = f"original_{filename}"
-        json_filename = f"processed_{filename}.json"
+        detections_filename = f"processed_{filename}{SIDECAR_SUFFIX}"
         
-        json_path = os.path.join(output_dir, json_filename)
-        if os.path.exists(json_path):
-            with open(json_path, 'r') as f:
-                metadata = json.load(f)
+        detections_path = os.path.join(output_dir, detections_filename)
+        if os.path.exists(detections_path):
+            with open(detections_path, 'rb') as f:
+                metadata = DetectionUtils.to_records(DetectionUtils.from_bytes(f.read()))
                 js_data.append({
                     'filename': filename,
                     'original_filename': original_filename,
@@ -162,7 +163,6 @@ def run_tests():
     for img_path in image_files:
         filename = os.path.basename(img_path)
         output_path = os.path.join(output_dir, f"processed_{filename}")
-        json_path = output_path + ".json"
         original_copy_path = os.path.join(output_dir, f"original_{filename}")
         
         # Copy original image for viewer
@@ -183,11 +183,6 @@ def run_tests():
             duration = time.time() - start_time
             
             count = result['objects_detected']
-            metadata = result.get('metadata', [])
-            
-            # Save metadata
-            with open(json_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
                 
             print(f"Success: {filename} -> {count} objects detected in {duration:.2f}s")
             
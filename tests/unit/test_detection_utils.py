@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from app.utils.detection_utils import DetectionUtils
+
+def _sample():
+    detections = [
+        ([100, 50, 20, 10], 'face', 0.98),
+        ([0, 0, 200, 100], 'plate', 1.0),
+        ([150, 75, 10, 5], 'face', 0.6)
+    ]
+    return DetectionUtils.to_arrays(detections, 200, 100, "test-model")
+
+def test_to_arrays():
+    arrays = _sample()
+    assert arrays["boxes"].shape == (3, 4)
+    assert arrays["boxes"].dtype == np.float32
+    np.testing.assert_allclose(arrays["boxes"][0], [0.5, 0.5, 0.1, 0.1])
+    np.testing.assert_allclose(arrays["scores"], [0.98, 1.0, 0.6])
+    assert DetectionUtils.summarize(arrays) == {"face": 2, "plate": 1}
+
+    empty = DetectionUtils.to_arrays([], 200, 100, "test-model")
+    assert empty["boxes"].shape == (0, 4)
+    assert DetectionUtils.summarize(empty) == {"face": 0, "plate": 0}
+
+def test_round_trip_and_filter():
+    arrays = DetectionUtils.from_bytes(DetectionUtils.to_bytes(_sample()))
+    assert str(arrays["model_version"]) == "test-model"
+
+    faces = DetectionUtils.filter(arrays, labels=["face"])
+    records = DetectionUtils.to_records(faces)
+    assert len(records) == 2
+    assert all(r["label"] == "face" for r in records)
+
+    confident = DetectionUtils.filter(arrays, labels=["face"], min_score=0.9)
+    assert len(confident["labels"]) == 1
+    np.testing.assert_allclose(confident["scores"], [0.98])
+
+    assert len(DetectionUtils.filter(arrays, min_score=1.5)["labels"]) == 0
+
+def test_from_bytes_rejects_other_objects():
+    with pytest.raises(ValueError):
+        DetectionUtils.from_bytes(b"\xff\xd8\xff\xe0 not a sidecar")
+
+    other = DetectionUtils.to_arrays([], 10, 10, "test-model")
+    del other["scores"]
+    with pytest.raises(ValueError):
+        DetectionUtils.from_bytes(DetectionUtils.to_bytes(other))
@@ -1,18 +1,7 @@
 import numpy as np
+import pytest
 from app.utils.image_utils import ImageUtils
 
-def test_slice_image():
-    # Create a 2048x2048 dummy image
-    image = np.zeros((2048, 2048, 3), dtype=np.uint8)
-    tiles = ImageUtils.slice_image(image, tile_size=1024, overlap=0.0)
-    
-    # Should be exactly 4 tiles (2x2)
-    assert len(tiles) == 4
-    assert tiles[0][1] == 0 # x
-    assert tiles[0][2] == 0 # y
-    assert tiles[3][1] == 1024 # x
-    assert tiles[3][2] == 1024 # y
-
 def test_merge_boxes():
     # Two overlapping boxes
     boxes = [
@@ -29,3 +18,90 @@ def test_merge_boxes():
     ]
     merged = ImageUtils.merge_boxes(boxes, iou_threshold=0.5)
     assert len(merged) == 2
+
+def test_plan_windows():
+    # Fits within budget -> single window
+    assert ImageUtils.plan_windows(100, 100, max_pixels=10000) == [(0, 0, 100, 100)]
+
+    # Full-width strips, each padded strip stays within budget
+    windows = ImageUtils.plan_windows(1000, 100, max_pixels=20000, overlap=10)
+    assert all(w == 100 for _, _, w, _ in windows)
+    assert all((h + 20) * 100 <= 20000 for _, _, _, h in windows)
+    assert sum(h for _, _, _, h in windows) == 1000
+
+    # Very wide image falls back to square windows covering the whole image
+    windows = ImageUtils.plan_windows(500, 100000, max_pixels=40000, overlap=50)
+    assert sum(w * h for _, _, w, h in windows) == 500 * 100000
+    assert all((w + 100) * (h + 100) <= 40000 for _, _, w, h in windows)
+
+def test_plan_tiling():
+    # Default 20px faces: MTCNN scales a 2000px tile to 1200px -> single pass up to 2000px
+    plan = ImageUtils.plan_tiling(1999, 1999, min_object_px=20, max_object_px=200)
+    assert not plan["tiled"]
+    assert plan["tiles"] == 1
+
+    # Just over the limit -> smallest grid, not a fixed 1024px slicing
+    plan = ImageUtils.plan_tiling(2001, 2001, min_object_px=20, max_object_px=200)
+    assert plan["tiled"]
+    assert plan["tiles"] == 4
+    assert plan["tile_width"] <= 2000 and plan["overlap"] == 200
+
+    # Larger objects -> coarser pyramid -> larger tiles fit the same per-call budget
+    plan = ImageUtils.plan_tiling(3000, 3000, min_object_px=40, max_object_px=200)
+    assert not plan["tiled"]
+
+    # Smaller objects -> finer pyramid -> tiles shrink to keep per-call memory bounded
+    plan = ImageUtils.plan_tiling(1500, 1500, min_object_px=12, max_object_px=100)
+    assert plan["tiled"]
+    assert plan["tile_width"] <= 1200
+
+    # Explicit overrides win
+    plan = ImageUtils.plan_tiling(1500, 1500, min_object_px=20, max_object_px=200, tile_size=512, overlap=64)
+    assert plan["overlap"] == 64
+    assert plan["tile_width"] <= 512
+
+def test_plan_tiling_overrides_accepted_by_schema():
+    # tile_size alone: overlap derived from max_object_px, capped below half the tile
+    plan = ImageUtils.plan_tiling(4000, 4000, min_object_px=20, max_object_px=200, tile_size=256)
+    assert plan["tiled"]
+    assert 0 <= plan["overlap"] < 128
+    assert plan["tile_width"] <= 256
+
+    plan = ImageUtils.plan_tiling(4000, 4000, min_object_px=20, max_object_px=200, tile_size=400)
+    assert plan["overlap"] == 199
+
+    # Small image with a large max_object_px -> single pass, no overlap check
+    plan = ImageUtils.plan_tiling(300, 300, min_object_px=20, max_object_px=1000)
+    assert not plan["tiled"]
+    plan = ImageUtils.plan_tiling(300, 300, min_object_px=12, max_object_px=600, tile_size=256)
+    assert plan["tiled"]
+    assert 2 * plan["overlap"] < 256
+
+    # Large max_object_px on a tiled image is capped rather than rejected
+    plan = ImageUtils.plan_tiling(4000, 4000, min_object_px=12, max_object_px=600)
+    assert plan["tiled"]
+    assert 2 * plan["overlap"] < 1200
+
+def test_plan_tiling_rejects_bad_plans():
+    for kwargs in (
+        {"min_object_px": 0, "max_object_px": 200},
+        {"min_object_px": 20, "max_object_px": 200, "tile_size": -5},
+        {"min_object_px": 20, "max_object_px": 200, "tile_size": 300, "overlap": 150},
+        {"min_object_px": 20, "max_object_px": 200, "tile_size": 256, "overlap": 0, "max_tiles": 100}
+    ):
+        with pytest.raises(ValueError):
+            ImageUtils.plan_tiling(4000, 4000, **kwargs)
+
+def test_slice_image_grid():
+    image = np.zeros((2001, 3000, 3), dtype=np.uint8)
+    plan = ImageUtils.plan_tiling(2001, 3000, min_object_px=20, max_object_px=200)
+    tiles = ImageUtils.slice_image_grid(image, plan)
+    assert len(tiles) == plan["tiles"]
+
+    # Tiles cover the full image
+    covered = np.zeros((2001, 3000), dtype=bool)
+    for tile, x, y in tiles:
+        th, tw = tile.shape[:2]
+        assert tw <= 2000 and th <= 2000
+        covered[y:y + th, x:x + tw] = True
+    assert covered.all()
@@ -0,0 +1,116 @@
+import importlib
+import sys
+import types
+import numpy as np
+import pytest
+import tifffile
+from app.core.config import settings
+from app.services.privacy_blurrer import PrivacyBlurrer
+from app.utils.image_utils import ImageUtils
+
+GEO_TAGS = [
+    (33550, 'd', 3, (0.1, 0.1, 0.0), True),
+    (33922, 'd', 6, (0.0, 0.0, 0.0, 500000.0, 4000000.0, 0.0), True),
+    (34735, 'H', 8, (1, 1, 0, 1, 1024, 0, 1, 1), True)
+]
+
+class StubInferenceEngine:
+    """Detects pure white squares that lie fully inside the given image."""
+
+    def detect_faces(self, image, min_face_size=20):
+        ys, xs = np.where((image == 255).all(axis=2))
+        if len(xs) == 0:
+            return []
+        h, w = image.shape[:2]
+        if xs.min() == 0 or ys.min() == 0 or xs.max() == w - 1 or ys.max() == h - 1:
+            return []
+        return [([int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1)], 0.9)]
+
+    def detect_plates(self, image, min_size=30):
+        return []
+
+@pytest.fixture
+def processor(monkeypatch):
+    engine_module = types.ModuleType('app.models.inference_engine')
+    engine_module.InferenceEngine = StubInferenceEngine
+    monkeypatch.setitem(sys.modules, 'app.models.inference_engine', engine_module)
+    monkeypatch.delitem(sys.modules, 'app.services.job_processor', raising=False)
+    job_processor = importlib.import_module('app.services.job_processor')
+
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 1)
+    monkeypatch.setattr(settings, 'WINDOW_OVERLAP_PX', 64)
+    monkeypatch.setattr(settings, 'TILING_MAX_OBJECT_PX', 64)
+    return job_processor.JobProcessor()
+
+def test_process_tiff_file_box_across_windows(processor, tmp_path):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 200, (1500, 1200, 3), dtype=np.uint8)
+    box = [470, 640, 80, 80]
+    image[box[1]:box[1] + box[3], box[0]:box[0] + box[2]] = 255
+
+    # The box must straddle window cores for this test to be meaningful
+    max_pixels = settings.MEMORY_BUDGET_MB * 1024 * 1024 // (3 * 4)
+    windows = ImageUtils.plan_windows(1500, 1200, max_pixels, settings.WINDOW_OVERLAP_PX)
+    touched = [(x, y) for x, y, w, h in windows
+               if x < box[0] + box[2] and box[0] < x + w and y < box[1] + box[3] and box[1] < y + h]
+    assert len(touched) > 1
+
+    input_path = str(tmp_path / 'input.tif')
+    output_path = str(tmp_path / 'output.tif')
+    tifffile.imwrite(input_path, image, tile=(256, 256), photometric='rgb', extratags=GEO_TAGS)
+
+    detections = processor.process_tiff_file(input_path, output_path)
+
+    # Seen by several padded windows, kept once
+    assert len(detections["labels"]) == 1
+    np.testing.assert_allclose(detections["boxes"][0], [470 / 1200, 640 / 1500, 80 / 1200, 80 / 1500], rtol=1e-5)
+    np.testing.assert_allclose(detections["scores"], [0.9])
+
+    # Seam-free: identical to blurring the full frame at once
+    expected = PrivacyBlurrer().apply_blur(image, [box])
+    with tifffile.TiffFile(output_path) as tif:
+        page = tif.pages[0]
+        assert page.is_tiled
+        assert np.array_equal(page.asarray(), expected)
+        assert page.tags[33922].value == GEO_TAGS[1][3]
+
+def test_process_tiff_file_object_larger_than_overlap(processor, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 8)
+    rng = np.random.default_rng(1)
+    image = rng.integers(0, 200, (1500, 1200, 3), dtype=np.uint8)
+    box = [620, 360, 200, 200]
+    image[box[1]:box[1] + box[3], box[0]:box[0] + box[2]] = 255
+    tiling = {"max_object_px": 300}
+
+    # Wider than twice the configured overlap and crossing a window edge
+    assert box[2] > 2 * settings.WINDOW_OVERLAP_PX
+    max_pixels = settings.MEMORY_BUDGET_MB * 1024 * 1024 // (3 * 4)
+    windows = ImageUtils.plan_windows(1500, 1200, max_pixels, tiling["max_object_px"])
+    touched = [(x, y) for x, y, w, h in windows
+               if x < box[0] + box[2] and box[0] < x + w and y < box[1] + box[3] and box[1] < y + h]
+    assert len(touched) > 1
+
+    input_path = str(tmp_path / 'input.tif')
+    output_path = str(tmp_path / 'output.tif')
+    tifffile.imwrite(input_path, image, tile=(256, 256), photometric='rgb')
+
+    detections = processor.process_tiff_file(input_path, output_path, tiling)
+
+    assert len(detections["labels"]) == 1
+    expected = PrivacyBlurrer().apply_blur(image, [box])
+    assert np.array_equal(tifffile.imread(output_path), expected)
+
+def test_process_tiff_file_ycbcr_input(processor, tmp_path):
+    pytest.importorskip('imagecodecs')
+    image = np.full((300, 400, 3), 100, dtype=np.uint8)
+    input_path = str(tmp_path / 'input.tif')
+    output_path = str(tmp_path / 'output.tif')
+    tifffile.imwrite(input_path, image, tile=(256, 256), compression='jpeg', photometric='ycbcr', extratags=GEO_TAGS)
+
+    processor.process_tiff_file(input_path, output_path)
+
+    with tifffile.TiffFile(input_path) as source, tifffile.TiffFile(output_path) as result:
+        assert result.pages[0].photometric == tifffile.PHOTOMETRIC.RGB
+        assert np.array_equal(result.pages[0].asarray(), source.pages[0].asarray())
+        for code, _, _, value, _ in GEO_TAGS:
+            assert result.pages[0].tags[code].value == value